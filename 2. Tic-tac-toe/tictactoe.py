@@ -3,7 +3,6 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
 import random
 from operator import itemgetter
 
@@ -11,6 +10,42 @@ X = "X"
 O = "O"
 EMPTY = None
 
+# Internally a board is stored as two 9-bit integers, one per player,
+# where cell (i, j) is bit 3 * i + j.
+FULL_BOARD = 0x1FF
+LINES = [0b111000000, 0b000111000, 0b000000111,
+         0b100100100, 0b010010010, 0b001001001,
+         0b100010001, 0b001010100]
+
+# The 8 symmetries of the board: 4 rotations, each optionally mirrored.
+# SYMMETRIES[s][k] is the cell that cell k is moved to by symmetry s.
+SYMMETRIES = [(0, 1, 2, 3, 4, 5, 6, 7, 8),
+              (2, 5, 8, 1, 4, 7, 0, 3, 6),
+              (8, 7, 6, 5, 4, 3, 2, 1, 0),
+              (6, 3, 0, 7, 4, 1, 8, 5, 2),
+              (2, 1, 0, 5, 4, 3, 8, 7, 6),
+              (8, 5, 2, 7, 4, 1, 6, 3, 0),
+              (6, 7, 8, 3, 4, 5, 0, 1, 2),
+              (0, 3, 6, 1, 4, 7, 2, 5, 8)]
+INVERSE_SYMMETRIES = [tuple(symmetry.index(k) for k in range(9))
+                      for symmetry in SYMMETRIES]
+
+# Transposition table used by minimax_helper. Positions reachable through
+# different move orders, or equal up to a symmetry of the board, are
+# searched once; they are keyed on their canonical form. Each entry stores
+# (flag, value, move), where flag says whether value is exact or only a
+# bound on the real value, depending on the alpha-beta window it was
+# searched with. The move is stored in the canonical orientation.
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+transposition_table = dict()
+
+# Best move for every position reachable from the initial state, keyed on the
+# canonical form of the position (with the move in the canonical orientation).
+# It is filled by build_book() the first time minimax is called.
+book = dict()
+
 
 def initial_state():
     """
@@ -21,37 +56,121 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
-def player(board):
+def to_bitboards(board):
     """
-    Returns player who has the next turn on a board.
+    Returns a tuple (x_bb, o_bb) with the cells taken by X and by O.
     """
-    x_count = 0
-    o_count = 0
-    for row in board:
-        for cell in row:
-            if cell == X:
-                x_count += 1
-            elif cell == O:
-                o_count += 1
+    x_bb = 0
+    o_bb = 0
+    for i in range(0, 3):
+        for j in range(0, 3):
+            if board[i][j] == X:
+                x_bb |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o_bb |= 1 << (3 * i + j)
 
-    if x_count == o_count:
+    return x_bb, o_bb
+
+
+def player_bb(x_bb, o_bb):
+    """
+    Returns player who has the next turn on a bitboard pair.
+    """
+    if (x_bb | o_bb).bit_count() % 2 == 0:
         return X
 
     return O
 
 
-def actions(board):
+def actions_bb(x_bb, o_bb):
     """
-    Returns set of all possible actions (i, j) available on the board.
+    Yields every empty cell (i, j) of a bitboard pair.
     """
-    move = []
+    empties = ~(x_bb | o_bb) & FULL_BOARD
+    while empties:
+        idx = (empties & -empties).bit_length() - 1
+        empties &= empties - 1
+        yield idx // 3, idx % 3
+
+
+def winner_bb(x_bb, o_bb):
+    """
+    Returns the winner on a bitboard pair, if there is one.
+    """
+    for mask in LINES:
+        if x_bb & mask == mask:
+            return X
+        if o_bb & mask == mask:
+            return O
+
+    return None
+
+
+def terminal_bb(x_bb, o_bb):
+    """
+    Returns True if the game on a bitboard pair is over, False otherwise.
+    """
+    return (x_bb | o_bb) == FULL_BOARD or winner_bb(x_bb, o_bb) is not None
+
+
+def permute_bb(bb, symmetry):
+    """
+    Returns the bitboard `bb` with every cell k moved to symmetry[k].
+    """
+    permuted = 0
+    for k in range(0, 9):
+        if bb >> k & 1:
+            permuted |= 1 << symmetry[k]
+
+    return permuted
+
+
+# permute_bb for every symmetry and every 9-bit value, so canonicalising a
+# position only takes table lookups.
+PERMUTED_BB = [[permute_bb(bb, symmetry) for bb in range(FULL_BOARD + 1)]
+               for symmetry in SYMMETRIES]
+
+
+def canonical(x_bb, o_bb):
+    """
+    Returns a tuple (key, s), where key is the smallest (x_bb, o_bb) pair
+    over all symmetries of the position and s is the index of the symmetry
+    in SYMMETRIES that produces it.
+    """
+    best_key = (x_bb, o_bb)
+    best_symmetry = 0
+    for s in range(1, 8):
+        table = PERMUTED_BB[s]
+        key = (table[x_bb], table[o_bb])
+        if key < best_key:
+            best_key = key
+            best_symmetry = s
+
+    return best_key, best_symmetry
 
-    for i in range(0, 3):
-        for j in range(0, 3):
-            if board[i][j] == EMPTY:
-                move.append((i, j))
 
-    return move
+def permute_move(move, symmetry):
+    """
+    Returns the move (i, j) with its cell moved by `symmetry`.
+    """
+    if move == (-1, -1):
+        return move
+
+    return divmod(symmetry[3 * move[0] + move[1]], 3)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return player_bb(*to_bitboards(board))
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return list(actions_bb(*to_bitboards(board)))
 
 
 def result(board, action):
@@ -64,7 +183,7 @@ def result(board, action):
     if i < 0 or i >= 3 or j < 0 or j >= 3 or board[i][j] != EMPTY:
         raise ValueError("Invalid action")
 
-    temp_board = copy.deepcopy(board)
+    temp_board = [row[:] for row in board]
     temp_board[i][j] = symbol
 
     return temp_board
@@ -74,36 +193,14 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for i in range(0, 3):
-        if board[i][0] is not None and board[i][0] == board[i][1] == board[i][2]:
-            return board[i][0]
-
-        if board[0][i] is not None and board[0][i] == board[1][i] == board[2][i]:
-            return board[0][i]
-
-    if board[0][0] is not None and board[0][0] == board[1][1] == board[2][2]:
-        return board[0][0]
-
-    if board[0][2] is not None and board[0][2] == board[1][1] == board[2][0]:
-        return board[0][2]
-
-    return None
+    return winner_bb(*to_bitboards(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True
-
-    empty_count = 0
-    for row in board:
-        for cell in row:
-            if cell == EMPTY:
-                empty_count += 1
-
-    return empty_count == 0
+    return terminal_bb(*to_bitboards(board))
 
 def utility(board):
     """
@@ -122,39 +219,128 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board):
+    x_bb, o_bb = to_bitboards(board)
+    if terminal_bb(x_bb, o_bb):
         return None
 
-    move, _ = minimax_helper(board)
-
-    return move
-
-def minimax_helper(board) :
-    if terminal(board):
-        return (-1, -1), utility(board)
-
-    possible_actions = actions(board)
-    choices = []
-
-    for i in range(0, len(possible_actions)):
-        _, value = minimax_helper(result(board, possible_actions[i]))
-        choices.append((possible_actions[i], value))
+    if not book:
+        build_book()
 
-    if player(board) == X:
-        max_value = -2
-        max_index = 0
-        for i in range(0, len(choices)):
-            if choices[i][1] > max_value:
-                max_value = choices[i][1]
-                max_index = i
+    key, symmetry = canonical(x_bb, o_bb)
+    move = book.get(key)
+    if move is None:
+        # Not reachable by legal play, e.g. O has moved more often than X
+        move, _ = minimax_helper(x_bb, o_bb)
+        return move
 
-        return choices[max_index][0], max_value
+    return permute_move(move, INVERSE_SYMMETRIES[symmetry])
 
-    min_value = 2
-    min_index = 0
-    for i in range(0, len(choices)):
-        if choices[i][1] < min_value:
-            min_value = choices[i][1]
-            min_index = i
+def build_book():
+    """
+    Fills `book` with the best move of every non-terminal position that can
+    be reached from the initial state.
+    """
+    stack = [(0, 0)]
+    while stack:
+        key, _ = canonical(*stack.pop())
+        if key in book or terminal_bb(*key):
+            continue
+
+        x_bb, o_bb = key
+        move, _ = minimax_helper(x_bb, o_bb)
+        book[key] = move
+
+        for i, j in actions_bb(x_bb, o_bb):
+            if player_bb(x_bb, o_bb) == X:
+                stack.append((x_bb | 1 << (3 * i + j), o_bb))
+            else:
+                stack.append((x_bb, o_bb | 1 << (3 * i + j)))
+
+def minimax_helper(x_bb, o_bb, alpha=-2, beta=2):
+    """
+    Returns a tuple (move, value) for the current player on a bitboard
+    pair, searching with alpha-beta pruning. Branches that cannot change
+    the outcome (once alpha >= beta) are skipped. Wins are scored slightly
+    lower the more cells are filled, so the fastest win is preferred.
+
+    Results are cached in `transposition_table` under the canonical form
+    of the position, so a position (or any rotation or mirror image of
+    it) is only searched again if the stored bound does not settle it.
+    """
+    alpha_original = alpha
+    beta_original = beta
+    move = None
+    key, symmetry = canonical(x_bb, o_bb)
+    entry = transposition_table.get(key)
+    if entry is not None:
+        flag, value, move = entry
+        move = permute_move(move, INVERSE_SYMMETRIES[symmetry])
+        if flag == EXACT:
+            return move, value
+        if flag == LOWERBOUND:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return move, value
+
+    move, value = search(x_bb, o_bb, alpha, beta, move)
+
+    if value <= alpha_original:
+        flag = UPPERBOUND
+    elif value >= beta_original:
+        flag = LOWERBOUND
+    else:
+        flag = EXACT
+    transposition_table[key] = (flag, value, permute_move(move, SYMMETRIES[symmetry]))
+
+    return move, value
+
+def search(x_bb, o_bb, alpha, beta, first_move=None):
+    """
+    Searches every move of the current player on a bitboard pair within
+    the (alpha, beta) window and returns a tuple (move, value).
 
-    return choices[min_index][0], min_value
+    `first_move` is the move stored in the transposition table, if any.
+    It is tried before the others, so when the window was narrowed by a
+    stored bound the returned move is still one that reaches that bound.
+    """
+    win = winner_bb(x_bb, o_bb)
+    depth = (x_bb | o_bb).bit_count()
+    if win == X:
+        return (-1, -1), 1 - depth / 10
+    if win == O:
+        return (-1, -1), -1 + depth / 10
+    if depth == 9:
+        return (-1, -1), 0
+
+    best_move = None
+    possible_actions = list(actions_bb(x_bb, o_bb))
+    if first_move in possible_actions:
+        possible_actions.remove(first_move)
+        possible_actions.insert(0, first_move)
+
+    if depth % 2 == 0:
+        best_value = -2
+        for i, j in possible_actions:
+            _, value = minimax_helper(x_bb | 1 << (3 * i + j), o_bb, alpha, beta)
+            if value > best_value:
+                best_value = value
+                best_move = (i, j)
+            alpha = max(alpha, best_value)
+            if best_value >= beta:
+                break
+
+        return best_move, best_value
+
+    best_value = 2
+    for i, j in possible_actions:
+        _, value = minimax_helper(x_bb, o_bb | 1 << (3 * i + j), alpha, beta)
+        if value < best_value:
+            best_value = value
+            best_move = (i, j)
+        beta = min(beta, best_value)
+        if best_value <= alpha:
+            break
+
+    return best_move, best_value
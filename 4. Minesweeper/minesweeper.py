@@ -1,5 +1,10 @@
+import bisect
 import random
-import copy
+
+import numpy as np
+
+# Print the progress of the AI's inference while it plays
+DEBUG = False
 
 
 class Minesweeper():
@@ -15,20 +20,16 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = np.zeros((height, width), dtype=bool)
 
         # Add mines randomly
         while len(self.mines) != mines:
             i = random.randrange(height)
             j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+            self.mines.add((i, j))
+        if self.mines:
+            rows, columns = zip(*self.mines)
+            self.board[list(rows), list(columns)] = True
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -38,19 +39,14 @@ class Minesweeper():
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
+        for row in self.board:
             print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
+            print("".join("|X" if cell else "| " for cell in row) + "|")
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +54,12 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        # Sum the block of cells within one row and column (slicing stops
+        # at the edges of the board), then leave out the cell itself
+        nearby = self.board[max(0, i - 1):i + 2, max(0, j - 1):j + 2]
+        return int(nearby.sum()) - int(self.board[i, j])
 
     def won(self):
         """
@@ -92,12 +76,17 @@ class Sentence():
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # The hash changes when a cell is marked, so sets of sentences
+        # must be rebuilt after marking
+        return hash((self.cells, self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -106,7 +95,7 @@ class Sentence():
         Returns the set of all cells in self.cells known to be mines.
         """
         if len(self.cells) == self.count:
-            return copy.deepcopy(self.cells)
+            return self.cells
         return None
 
     def known_safes(self):
@@ -114,7 +103,7 @@ class Sentence():
         Returns the set of all cells in self.cells known to be safe.
         """
         if self.count == 0:
-            return copy.deepcopy(self.cells)
+            return self.cells
         return None
 
     def mark_mine(self, cell):
@@ -123,7 +112,7 @@ class Sentence():
         a cell is known to be a mine.
         """
         if cell in self.cells:
-            self.cells.discard(cell)
+            self.cells = self.cells - {cell}
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -132,7 +121,7 @@ class Sentence():
         a cell is known to be safe.
         """
         if cell in self.cells:
-            self.cells.discard(cell)
+            self.cells = self.cells - {cell}
 
 
 class MinesweeperAI():
@@ -191,13 +180,16 @@ class MinesweeperAI():
         """
 
         # 1) mark the cell as a move that has been made
-        print(f"Started making move: {cell}")
+        if DEBUG:
+            print(f"Started making move: {cell}")
         self.moves_made.add(cell)
-        print("Stage 1 completed successfully")
+        if DEBUG:
+            print("Stage 1 completed successfully")
 
         # 2) mark the cell as safe
         self.mark_safe(cell)
-        print("Stage 2 completed successfully")
+        if DEBUG:
+            print("Stage 2 completed successfully")
 
 
         # 3) add a new sentence to the AI's knowledge base based on the value of `cell` and `count`
@@ -226,11 +218,12 @@ class MinesweeperAI():
 
         if neighbor_cells:
             self.knowledge.append(Sentence(neighbor_cells, adjusted_count))
-        print("Stage 3 completed successfully")
+        if DEBUG:
+            print("Stage 3 completed successfully")
 
         # 4) mark any additional cells as safe or as mines if it can be concluded based on the AI's knowledge base
         for sentence in self.knowledge:
-            current_cells = copy.deepcopy(sentence.cells)
+            current_cells = sentence.cells
             if len(sentence.cells) == sentence.count:
                 for curr_cell in current_cells:
                     self.mark_mine(curr_cell)
@@ -238,25 +231,33 @@ class MinesweeperAI():
             if sentence.count == 0:
                 for curr_cell in current_cells:
                     self.mark_safe(curr_cell)
-        print("Stage 4 completed successfully")
+        if DEBUG:
+            print("Stage 4 completed successfully")
 
         # 5) add any new sentences to the AI's knowledge base if they can be inferred from existing knowledge
+        # Only a smaller sentence can be a proper subset of another one, so
+        # sort by size and compare each sentence with the larger ones only
+        by_size = sorted(self.knowledge, key=lambda s: len(s.cells))
+        sizes = [len(s.cells) for s in by_size]
+        seen = set(self.knowledge)
         new_sentences = []
-        for sentence_i in self.knowledge:
-            for sentence_j in self.knowledge:
-                if sentence_i == sentence_j:
+        for sentence_i in by_size:
+            start = bisect.bisect_right(sizes, len(sentence_i.cells))
+            for sentence_j in by_size[start:]:
+                if not sentence_i.cells < sentence_j.cells:
+                    continue
+                count_diff = sentence_j.count - sentence_i.count
+                if count_diff < 0:
                     continue
-                if sentence_i.cells.issubset(sentence_j.cells):
-                    result = sentence_j.cells.difference(sentence_i.cells)
-                    count_diff = sentence_j.count - sentence_i.count
-                    if result and count_diff >= 0:
-                        new_sentence = Sentence(result, count_diff)
-                        if new_sentence not in self.knowledge and new_sentence not in new_sentences:
-                            new_sentences.append(new_sentence)
+                new_sentence = Sentence(sentence_j.cells - sentence_i.cells, count_diff)
+                if new_sentence not in seen:
+                    seen.add(new_sentence)
+                    new_sentences.append(new_sentence)
         self.knowledge.extend(new_sentences)
-        print(self.safes)
-        print(f"Intersection of safes and mines: {self.safes.intersection(self.mines)}")
-        print("Stage 5 completed successfully")
+        if DEBUG:
+            print(self.safes)
+            print(f"Intersection of safes and mines: {self.safes.intersection(self.mines)}")
+            print("Stage 5 completed successfully")
 
         self.safes.difference_update(self.mines)
 
@@ -278,7 +279,8 @@ class MinesweeperAI():
 
         for move in self.safes:
             if move not in self.moves_made:
-                print(move)
+                if DEBUG:
+                    print(move)
                 return move
 
         return None
@@ -1,10 +1,14 @@
+import bisect
 import os
-import random
 import re
 import sys
 
+import numpy as np
+
 DAMPING = 0.85
 SAMPLES = 1000000
+DEBUG = False
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
 
 
 def main():
@@ -39,7 +43,7 @@ def crawl(directory):
             continue
         with open(os.path.join(directory, filename)) as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
+            links = LINK_PATTERN.findall(contents)
             pages[filename] = set(links) - {filename}
 
     # Only include links to other pages in the corpus
@@ -90,51 +94,55 @@ def transition_model(corpus, page, damping_factor):
     
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, rng=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The start page and every step are drawn from `rng`, a NumPy Generator,
+    so passing e.g. `np.random.default_rng(seed)` makes the sample
+    reproducible. By default a freshly seeded generator is used.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    probability_dictionary = dict()
+    pages = sorted(corpus)
+    page_index = {page: i for i, page in enumerate(pages)}
+
+    # Row i holds the transition model of page i, as a cumulative
+    # distribution, so the next page is found by bisecting a random number
+    transitions = np.zeros((len(pages), len(pages)))
+    for page in pages:
+        for next_page, probability in transition_model(corpus, page, damping_factor).items():
+            transitions[page_index[page], page_index[next_page]] = probability
+    cumulative = transitions.cumsum(axis=1)
+    cumulative[:, -1] = 1.0
+    cumulative_rows = cumulative.tolist()
+
     all_files_in_corpus = set()
     for p_set in corpus.values():
         all_files_in_corpus.update(p_set)
 
-    current_page = random.choice(list(all_files_in_corpus))
-    probability_dictionary[current_page] = 1
-
-    for _ in range(1, n):
-        probability_dictionary_transition = transition_model(corpus, current_page, damping_factor)
-
-        page_list = []
-        page_weights = []
-        for page, probability in probability_dictionary_transition.items():
-            page_list.append(page)
-            page_weights.append(probability)
-
-
-        current_page = random.choices(page_list, weights=page_weights, k=1)[0]
-        if current_page not in probability_dictionary:
-            probability_dictionary[current_page] = 1
-        else:
-            probability_dictionary[current_page] += 1
-
-    value_sum = 0
-    for page, probability in probability_dictionary.items():
-        value_sum += probability
-
-    for key in probability_dictionary:
-        probability_dictionary[key] = probability_dictionary[key] / value_sum
-
-    probability_sum = 0
-    for page, probability in probability_dictionary.items():
-        probability_sum += probability
-
-    print(f"Sum of probabilities: {probability_sum}")
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Sorted, so the start page only depends on the generator and not on
+    # the iteration order of the set
+    start_pages = sorted(all_files_in_corpus)
+    trajectory = [0] * n
+    current_page = page_index[start_pages[rng.integers(len(start_pages))]]
+    trajectory[0] = current_page
+    draws = rng.random(n).tolist()
+    for k in range(1, n):
+        current_page = bisect.bisect_right(cumulative_rows[current_page], draws[k])
+        trajectory[k] = current_page
+
+    counts = np.bincount(trajectory, minlength=len(pages))
+    probability_dictionary = {page: counts[i] / n for i, page in enumerate(pages)}
+
+    if DEBUG:
+        print(f"Sum of probabilities: {sum(probability_dictionary.values())}")
     return probability_dictionary
 
 
@@ -147,69 +155,38 @@ def iterate_pagerank(corpus, damping_factor):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    old_probability_dictionary = dict()
-    new_probability_dictionary = dict()
     all_files_in_corpus = set()
     for p, p_set in corpus.items():
         all_files_in_corpus.update(p_set)
         all_files_in_corpus.add(p)
+    pages = sorted(all_files_in_corpus)
+    page_index = {page: i for i, page in enumerate(pages)}
+    n = len(pages)
+
+    # links[i, j] is the probability of following a link from page j to
+    # page i. A page without links is treated as linking to every page.
+    links = np.zeros((n, n))
+    for page in pages:
+        j = page_index[page]
+        page_links = corpus.get(page)
+        if page_links:
+            for link in page_links:
+                links[page_index[link], j] = 1.0 / len(page_links)
+        else:
+            links[:, j] = 1.0 / n
 
-    for file in all_files_in_corpus:
-        new_probability_dictionary[file] = 1.0 / len(all_files_in_corpus)
-        old_probability_dictionary[file] = 0.0
-
-    one_minus_d_over_n = (1.0 - damping_factor) / len(all_files_in_corpus)
+    old_ranks = np.full(n, 1.0 / n)
     while True:
-        for j in all_files_in_corpus:
-            new_probability_dictionary[j] = one_minus_d_over_n + calculate_second_part(damping_factor, j, corpus, old_probability_dictionary)
-
-        no_change = True
-        for file in all_files_in_corpus:
-            if abs(new_probability_dictionary[file] - old_probability_dictionary[file]) > 0.001:
-                no_change = False
-                break
-
-        if no_change:
-            probability_sum = 0
-            for _, probability in new_probability_dictionary.items():
-                probability_sum += probability
-
-
-            for k in all_files_in_corpus:
-                new_probability_dictionary[k] = new_probability_dictionary[k] * (1.0 / probability_sum)
-
-            print(f"Sum of probabilities: {probability_sum * (1.0 / probability_sum)}")
-            return new_probability_dictionary
-
-        for i in all_files_in_corpus:
-            old_probability_dictionary[i] = new_probability_dictionary[i]
-
-def calculate_second_part(damping_factor, page, corpus, probability_dictionary):
-    all_pages = set()
-    for key in corpus:
-        all_pages.update(corpus[key])
-        all_pages.add(key)
-
-    for i in all_pages:
-        if i not in corpus:
-            corpus[i] = all_pages
-        elif len(corpus[i]) == 0:
-            corpus[i] = all_pages
-
-
-    i_linked_to_page = []
-    for key in corpus:
-        if page in corpus[key]:
-            i_linked_to_page.append(key)
-
-    i_sum = 0
-    for i_page in i_linked_to_page:
-        i_page_probability = probability_dictionary[i_page]
-        i_num_links = len(corpus[i_page])
+        new_ranks = (1.0 - damping_factor) / n + damping_factor * (links @ old_ranks)
+        if np.max(np.abs(new_ranks - old_ranks)) <= 0.001:
+            break
+        old_ranks = new_ranks
 
-        i_sum += i_page_probability / i_num_links
+    new_ranks /= new_ranks.sum()
 
-    return i_sum * damping_factor
+    if DEBUG:
+        print(f"Sum of probabilities: {new_ranks.sum()}")
+    return {page: new_ranks[i] for i, page in enumerate(pages)}
 
 if __name__ == "__main__":
     main()
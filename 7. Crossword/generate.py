@@ -1,9 +1,12 @@
 import sys
+from collections import Counter, deque
 
 from pandas.util.version import Infinity
 
 from crossword import *
-import math
+
+# Print intermediate search results while solving
+DEBUG = False
 
 
 class CrosswordCreator():
@@ -18,6 +21,18 @@ class CrosswordCreator():
             for var in self.crossword.variables
         }
 
+        # Neighbors and overlaps never change for a crossword, so look them
+        # up once instead of recomputing them on every step of the search
+        self.neighbors = {
+            var: frozenset(self.crossword.neighbors(var))
+            for var in self.crossword.variables
+        }
+        self.overlaps = {
+            pair: overlap
+            for pair, overlap in self.crossword.overlaps.items()
+            if overlap is not None
+        }
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -125,23 +140,19 @@ class CrosswordCreator():
         False if no revision was made.
         """
         revised = False
-        overlaps_xy = self.crossword.overlaps[x, y]
+        overlaps_xy = self.overlaps.get((x, y))
         if overlaps_xy is None:
             return revised
 
-        elements_to_remove_from_x_domain = set()
-        mismatches = 0
-        for x_element in self.domains[x]:
-            for y_element in self.domains[y]:
-                if x_element[overlaps_xy[0]] != y_element[overlaps_xy[1]]:
-                    mismatches += 1
-            if mismatches == len(self.domains[y]):
-                elements_to_remove_from_x_domain.add(x_element)
-            mismatches = 0
+        # A word of x has a corresponding word of y exactly when some word
+        # of y has the same letter at the overlapping position
+        x_index, y_index = overlaps_xy
+        y_letters = {y_element[y_index] for y_element in self.domains[y]}
 
-
-        for x_element in elements_to_remove_from_x_domain:
-            self.domains[x].remove(x_element)
+        for x_element in list(self.domains[x]):
+            if x_element[x_index] not in y_letters:
+                self.domains[x].remove(x_element)
+                revised = True
 
         return revised
 
@@ -157,23 +168,27 @@ class CrosswordCreator():
         if arcs is None:
             arcs = []
             for x in self.crossword.variables:
-                for n in self.crossword.neighbors(x):
-                    if (x, n) not in arcs:
-                        arcs.append((x, n))
+                for n in self.neighbors[x]:
+                    arcs.append((x, n))
 
-        queue = list(arcs)
+        # `in_queue` mirrors `queue`, so an arc that is already waiting to
+        # be revised is not added a second time
+        queue = deque(dict.fromkeys(arcs))
+        in_queue = set(queue)
 
         while len(queue) > 0:
-            x, y = queue.pop(0)
-            print(len(queue))
+            x, y = queue.popleft()
+            in_queue.discard((x, y))
 
             revise_happened = self.revise(x, y)
             if revise_happened:
                 if len(self.domains[x]) == 0:
                     return False
 
-                for z in self.crossword.neighbors(x) - {y}:
-                    queue.append((z, x))
+                for z in self.neighbors[x] - {y}:
+                    if (z, x) not in in_queue:
+                        in_queue.add((z, x))
+                        queue.append((z, x))
 
         return True
 
@@ -210,7 +225,7 @@ class CrosswordCreator():
                 if x == y:
                     continue
 
-                overlaps = self.crossword.overlaps[x, y]
+                overlaps = self.overlaps.get((x, y))
                 if overlaps is not None:
                     if assignment[x][overlaps[0]] != assignment[y][overlaps[1]]:
                         return False
@@ -218,6 +233,25 @@ class CrosswordCreator():
         return True
 
 
+    def fits(self, var, word, assignment):
+        """
+        Return True if assigning `word` to `var` agrees with every neighbor
+        of `var` already in `assignment`; return False otherwise.
+
+        Only the constraints involving `var` are checked, which is enough to
+        keep a consistent assignment consistent as it is extended one
+        variable at a time. Word lengths are already enforced by node
+        consistency and reused words are left out by `order_domain_values`.
+        """
+        for neighbor in self.neighbors[var]:
+            if neighbor in assignment:
+                overlaps = self.overlaps[var, neighbor]
+                if word[overlaps[0]] != assignment[neighbor][overlaps[1]]:
+                    return False
+
+        return True
+
+
     def order_domain_values(self, var, assignment):
         """
         Return a list of values in the domain of `var`, in order by
@@ -225,31 +259,40 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
-        domain_values = self.domains[var]
-
-        for word in assignment.values():
-            if word in domain_values:
-                domain_values.remove(word)
+        # Build a new list, since self.domains[var] must not lose the
+        # assigned words when the search backtracks
+        assigned_words = set(assignment.values())
+        domain_values = [
+            word for word in self.domains[var]
+            if word not in assigned_words
+        ]
 
-        neighbour_values = []
-        for neighbor in self.crossword.neighbors(var):
+        # For each unassigned neighbor, count how many of its words have each
+        # letter at the overlapping position. A word rules out every neighbor
+        # word that does not share its letter there.
+        neighbour_letters = []
+        for neighbor in self.neighbors[var]:
             if neighbor not in assignment:
-                neighbour_values.append(neighbor)
-
+                overlaps = self.overlaps[var, neighbor]
+                letter_counts = Counter(
+                    neighbor_word[overlaps[1]]
+                    for neighbor_word in self.domains[neighbor]
+                )
+                neighbour_letters.append(
+                    (overlaps[0], len(self.domains[neighbor]), letter_counts)
+                )
 
         word_elimination = dict()
         for word in domain_values:
-            word_elimination[word] = 0
-
-            for neighbor in neighbour_values:
-                overlaps = self.crossword.overlaps[var, neighbor]
-                for neighbor_word in self.domains[neighbor]:
-                    if word[overlaps[0]] != neighbor_word[overlaps[1]]:
-                        word_elimination[word] += 1
+            word_elimination[word] = sum(
+                total - letter_counts[word[index]]
+                for index, total, letter_counts in neighbour_letters
+            )
 
         sorted_words = sorted(word_elimination, key=word_elimination.get)
 
-        print(sorted_words)
+        if DEBUG:
+            print(sorted_words)
         return sorted_words
 
 
@@ -262,36 +305,10 @@ class CrosswordCreator():
         degree. If there is a tie, any of the tied variables are acceptable
         return values.
         """
-        available_variables = set()
-        for variable in self.crossword.variables:
-            if variable not in assignment:
-                available_variables.add(variable)
-
-
-        min_amount = math.inf
-        for var, dom in self.domains.items():
-            if var not in available_variables:
-                continue
-
-            if len(dom) < min_amount:
-                min_amount = len(dom)
-
-        min_amount_variables = set()
-        for var, dom in self.domains.items():
-            if var not in available_variables:
-                continue
-
-            if len(dom) == min_amount:
-                min_amount_variables.add(var)
-
-        if len(min_amount_variables) == 1:
-            return min_amount_variables.pop()
-
-        neighbor_dict = dict()
-        for var in min_amount_variables:
-            neighbor_dict[var] = self.crossword.neighbors(var)
-
-        return max(neighbor_dict, key=neighbor_dict.get)
+        return min(
+            (var for var in self.crossword.variables if var not in assignment),
+            key=lambda var: (len(self.domains[var]), -len(self.neighbors[var]))
+        )
 
     def backtrack(self, assignment):
         """
@@ -299,6 +316,8 @@ class CrosswordCreator():
         crossword and return a complete assignment if possible to do so.
 
         `assignment` is a mapping from variables (keys) to words (values).
+        It is extended in place as the search goes deeper, and every word
+        tried is removed again before backtracking.
 
         If no assignment is possible, return None.
         """
@@ -308,15 +327,16 @@ class CrosswordCreator():
         unassigned_variable = self.select_unassigned_variable(assignment)
 
         for word in self.order_domain_values(unassigned_variable, assignment):
-            new_assignment = assignment.copy()
+            if not self.fits(unassigned_variable, word, assignment):
+                continue
+
+            assignment[unassigned_variable] = word
 
-            new_assignment[unassigned_variable] = word
+            result = self.backtrack(assignment)
+            if result is not None:
+                return result
 
-            is_consistent = self.consistent(new_assignment)
-            if is_consistent:
-                result = self.backtrack(new_assignment)
-                if result is not None:
-                    return result
+            del assignment[unassigned_variable]
 
         return None
 
@@ -1,43 +1,120 @@
-import csv
+import hashlib
+import os
 import sys
-from lib2to3.pgen2.tokenize import double3prog
 
+import joblib
+import numpy as np
+import pandas as pd
+
+# Intel Extension for Scikit-learn swaps in oneDAL implementations of the
+# estimators below when it is installed. It has to patch scikit-learn
+# before they are imported.
+try:
+    from sklearnex import patch_sklearn
+    patch_sklearn(verbose=False)
+    SKLEARNEX = True
+except ImportError:
+    SKLEARNEX = False
+
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
 
 TEST_SIZE = 0.4
+# Part of the cache key; bump it whenever train_model or load_data change
+# the model they produce, so cached models from older code are not reused
+MODEL_VERSION = 1
+MONTHS = {
+    "Jan": 0, "Feb": 1, "Mar": 2, "Apr": 3, "May": 4, "June": 5,
+    "Jul": 6, "Aug": 7, "Sep": 8, "Oct": 9, "Nov": 10, "Dec": 11
+}
 
 
 def main():
     # Check command-line arguments
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python shopping.py data")
-
-    # Load data from spreadsheet and split into train and test sets
-    evidence, labels = load_data(sys.argv[1])
-    X_train, X_test, y_train, y_test = train_test_split(
-        evidence, labels, test_size=TEST_SIZE
-    )
-
-    # Train model and make predictions
-    model = train_model(X_train, y_train)
+    if len(sys.argv) == 3 and sys.argv[1] == "--cache":
+        use_cache = True
+    elif len(sys.argv) == 2:
+        use_cache = False
+    else:
+        sys.exit("Usage: python shopping.py [--cache] data")
+    filename = sys.argv[-1]
+
+    # With --cache, reuse the model and test set from an earlier run on the
+    # same data. This also keeps the same train/test split across runs.
+    cached = None
+    if use_cache:
+        cache = cache_filename(filename)
+        cached = load_cache(cache)
+
+    if cached is not None:
+        model, X_test, y_test = cached
+    else:
+        # Load data from spreadsheet and split into train and test sets
+        evidence, labels = load_data(filename)
+        X_train, X_test, y_train, y_test = train_test_split(
+            evidence, labels, test_size=TEST_SIZE
+        )
+
+        # Train model
+        model = train_model(X_train, y_train)
+        if use_cache:
+            joblib.dump((model, X_test, y_test), cache, compress=3)
+
+    # Make predictions
     predictions = model.predict(X_test)
-    sensitivity, specificity = evaluate(y_test, predictions)
+    counts = confusion_counts(y_test, predictions)
+    true_negatives, false_positives, false_negatives, true_positives = counts
+    sensitivity, specificity = rates(counts)
 
     # Print results
-    print(f"Correct: {(y_test == predictions).sum()}")
-    print(f"Incorrect: {(y_test != predictions).sum()}")
+    print(f"Correct: {true_positives + true_negatives}")
+    print(f"Incorrect: {false_positives + false_negatives}")
     print(f"True Positive Rate: {100 * sensitivity:.2f}%")
     print(f"True Negative Rate: {100 * specificity:.2f}%")
 
 
+def cache_filename(filename):
+    """
+    Return the path of the file, next to `filename`, that caches the model
+    trained on its data. The name changes whenever the data file is
+    modified, or TEST_SIZE, MODEL_VERSION, the scikit-learn version or the
+    use of sklearnex change, so a stale model is not reused.
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = ":".join(str(part) for part in (
+        path, stat.st_mtime, stat.st_size, TEST_SIZE,
+        MODEL_VERSION, sklearn.__version__, SKLEARNEX
+    ))
+    name = f".shopping_{hashlib.sha1(key.encode()).hexdigest()}.joblib"
+    return os.path.join(os.path.dirname(path), name)
+
+
+def load_cache(cache):
+    """
+    Return the tuple (model, X_test, y_test) saved in the file `cache`,
+    or None if there is no such file or it cannot be loaded.
+    """
+    if not os.path.exists(cache):
+        return None
+
+    # Unpickling can fail in many ways (a module that is no longer
+    # installed, a class that moved, a truncated file), and any of them
+    # just means the model has to be trained again
+    try:
+        return joblib.load(cache)
+    except Exception:
+        return None
+
+
 def load_data(filename):
     """
-    Load shopping data from a CSV file `filename` and convert into a list of
-    evidence lists and a list of labels. Return a tuple (evidence, labels).
+    Load shopping data from a CSV file `filename` and convert into an array
+    of evidence rows and an array of labels. Return a tuple (evidence, labels).
 
-    evidence should be a list of lists, where each list contains the
-    following values, in order:
+    evidence is a float32 NumPy array with one row per CSV row, where each
+    row contains the following values, in order:
         - Administrative, an integer
         - Administrative_Duration, a floating point number
         - Informational, an integer
@@ -56,87 +133,68 @@ def load_data(filename):
         - VisitorType, an integer 0 (not returning) or 1 (returning)
         - Weekend, an integer 0 (if false) or 1 (if true)
 
-    labels should be the corresponding list of labels, where each label
+    labels is the corresponding array of labels, where each label
     is 1 if Revenue is true, and 0 otherwise.
     """
-    evidence = []
-    labels = []
-    with open(filename, mode='r', newline='') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            current_evidence = [
-                int(row["Administrative"]),
-                float(row["Administrative_Duration"]),
-                int(row["Informational"]),
-                float(row["Informational_Duration"]),
-                int(row["ProductRelated"]),
-                float(row["ProductRelated_Duration"]),
-                float(row['BounceRates']),
-                float(row['ExitRates']),
-                float(row['PageValues']),
-                float(row['SpecialDay']),
-                month_number(row['Month']),
-                int(row['OperatingSystems']),
-                int(row['Browser']),
-                int(row['Region']),
-                int(row['TrafficType']),
-                visitor_type_number(row['VisitorType']),
-                bool_number(row['Weekend'])]
-
-            evidence.append(current_evidence)
-            labels.append(bool_number(row['Revenue']))
+    data = pd.read_csv(filename, dtype={
+        "Administrative": "int32",
+        "Administrative_Duration": "float32",
+        "Informational": "int32",
+        "Informational_Duration": "float32",
+        "ProductRelated": "int32",
+        "ProductRelated_Duration": "float32",
+        "BounceRates": "float32",
+        "ExitRates": "float32",
+        "PageValues": "float32",
+        "SpecialDay": "float32",
+        "Month": "category",
+        "OperatingSystems": "int32",
+        "Browser": "int32",
+        "Region": "int32",
+        "TrafficType": "int32",
+        "VisitorType": "category",
+        "Weekend": "bool",
+        "Revenue": "bool",
+    })
+
+    # Month and VisitorType are parsed as categoricals, so every distinct
+    # string is only handled once and rows are converted by their codes.
+    # Months missing from MONTHS, and empty fields, get the code -1.
+    months = data["Month"].cat.set_categories(list(MONTHS)).cat.codes
+    if (months < 0).any():
+        month = data["Month"][months < 0].iloc[0]
+        raise ValueError(f"Invalid month {month!r}")
+    data["Month"] = months
+    data["VisitorType"] = (data["VisitorType"] == "Returning_Visitor").astype("int8")
+    data["Weekend"] = data["Weekend"].astype("int8")
+    labels = data.pop("Revenue").to_numpy(np.int8)
+
+    # Fill one float32 array column by column, so the model gets contiguous
+    # float32 data and does not have to convert or copy it again
+    evidence = np.empty((len(data), len(data.columns)), dtype=np.float32)
+    for i, column in enumerate(data.columns):
+        evidence[:, i] = data[column].to_numpy(np.float32)
 
     return evidence, labels
 
 
-def month_number(month):
-    if month == "Jan":
-        return 0
-    elif month == "Feb":
-        return 1
-    elif month == "Mar":
-        return 2
-    elif month == "Apr":
-        return 3
-    elif month == "May":
-        return 4
-    elif month == "June":
-        return 5
-    elif month == "Jul":
-        return 6
-    elif month == "Aug":
-        return 7
-    elif month == "Sep":
-        return 8
-    elif month == "Oct":
-        return 9
-    elif month == "Nov":
-        return 10
-    elif month == "Dec":
-        return 11
-
-
-def visitor_type_number(visitor_type):
-    if visitor_type == "Returning_Visitor":
-        return 1
-    else:
-        return 0
-
-
-def bool_number(bool_value):
-    if bool_value == "TRUE":
-        return 1
-    else:
-        return 0
-
-
-def train_model(evidence, labels):
+def train_model(evidence, labels, n_jobs=-1):
     """
     Given a list of evidence lists and a list of labels, return a
     fitted k-nearest neighbor model (k=1) trained on the data.
+
+    The evidence is converted to a contiguous float32 array (a no-op for
+    the output of `load_data`), so lists and sliced arrays work as well.
+
+    `n_jobs` is the number of parallel jobs used by `predict` (-1 for all
+    cores). Callers that already run in worker processes should pass 1 to
+    avoid nested parallelism.
     """
-    model = KNeighborsClassifier(n_neighbors=1)
-    model.fit(evidence, labels)
+    model = KNeighborsClassifier(n_neighbors=1, n_jobs=n_jobs)
+    model.fit(
+        np.ascontiguousarray(evidence, dtype=np.float32),
+        np.asarray(labels, dtype=np.int8)
+    )
     return model
 
 
@@ -155,21 +213,29 @@ def evaluate(labels, predictions):
     representing the "true negative rate": the proportion of
     actual negative labels that were accurately identified.
     """
+    return rates(confusion_counts(labels, predictions))
+
 
-    true_positives = 0
-    true_negatives = 0
-    total_positives = 0
-    total_negatives = 0
-
-    for actual, predicted in zip(labels, predictions):
-        if actual == 1:
-            total_positives += 1
-            if predicted == 1:
-                true_positives += 1
-        else:
-            total_negatives += 1
-            if predicted == 0:
-                true_negatives += 1
+def confusion_counts(labels, predictions):
+    """
+    Given a list of actual labels and a list of predicted labels, return a
+    tuple (true_negatives, false_positives, false_negatives, true_positives).
+    """
+    labels = np.asarray(labels, dtype=np.int8)
+    predictions = np.asarray(predictions, dtype=np.int8)
+
+    # Count each (label, prediction) pair, 00, 01, 10 and 11, in one pass
+    return tuple(np.bincount(2 * labels + predictions, minlength=4).tolist())
+
+
+def rates(counts):
+    """
+    Given the tuple returned by `confusion_counts`, return a tuple
+    (sensitivity, specificity).
+    """
+    true_negatives, false_positives, false_negatives, true_positives = counts
+    total_positives = true_positives + false_negatives
+    total_negatives = true_negatives + false_positives
 
     sensitivity = true_positives / total_positives if total_positives > 0 else 0
     specificity = true_negatives / total_negatives if total_negatives > 0 else 0
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import shopping
+
+HEADER = (
+    "Administrative,Administrative_Duration,Informational,"
+    "Informational_Duration,ProductRelated,ProductRelated_Duration,"
+    "BounceRates,ExitRates,PageValues,SpecialDay,Month,OperatingSystems,"
+    "Browser,Region,TrafficType,VisitorType,Weekend,Revenue"
+)
+
+
+def row(month):
+    return (
+        f"0,0,0,0,1,0,0.2,0.2,0,0,{month},1,1,1,1,"
+        "Returning_Visitor,FALSE,FALSE"
+    )
+
+
+class LoadDataTest(unittest.TestCase):
+
+    def load(self, months):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        ) as f:
+            f.write("\n".join([HEADER] + [row(month) for month in months]))
+            f.write("\n")
+        self.addCleanup(os.remove, f.name)
+        return shopping.load_data(f.name)
+
+    def test_months(self):
+        evidence, labels = self.load(["Jan", "June", "Dec"])
+        self.assertEqual(evidence[:, 10].tolist(), [0, 5, 11])
+        self.assertEqual(labels.tolist(), [0, 0, 0])
+
+    def test_unknown_month(self):
+        with self.assertRaisesRegex(ValueError, "Invalid month 'Jun'"):
+            self.load(["Feb", "Jun", "Feb"])
+
+    def test_missing_month(self):
+        with self.assertRaises(ValueError):
+            self.load(["", "Feb", "Feb"])
+
+
+if __name__ == "__main__":
+    unittest.main()